@@ -4,3 +4,11 @@ class TokensError(Exception):
 
 class StatusCodeError(Exception):
     pass
+
+
+class TransientError(Exception):
+    pass
+
+
+class PermanentError(Exception):
+    pass
@@ -1,32 +1,79 @@
-import datetime
+import functools
 import logging
 import os
+import queue
+import random
+import signal
 import sys
+import threading
 import time
+import types
+from datetime import datetime
 from http import HTTPStatus
+from logging.handlers import MemoryHandler, RotatingFileHandler
 
 import requests
 import telegram
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
-from exceptions import StatusCodeError, TokensError
+from exceptions import (PermanentError, StatusCodeError, TokensError,
+                        TransientError)
 
-load_dotenv()
 
-PRACTICUM_TOKEN = os.getenv("PRACTICUM_TOKEN")
-TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
-TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+@functools.lru_cache(maxsize=None)
+def _load_env():
+    """Однократное чтение .env и переменных окружения."""
+    load_dotenv()
+    return (
+        os.getenv("PRACTICUM_TOKEN"),
+        os.getenv("TELEGRAM_TOKEN"),
+        os.getenv("TELEGRAM_CHAT_ID"),
+    )
+
+
+PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID = _load_env()
+
+TOKEN_NAMES = ("PRACTICUM_TOKEN", "TELEGRAM_TOKEN", "TELEGRAM_CHAT_ID")
 
 RETRY_TIME = 500
+BASE_DELAY = 1.0
+MAX_DELAY = 300
+JITTER = 0.5
+SEND_QUEUE_SIZE = 16
+TIMEOUT = (5, 30)
 ENDPOINT = "https://practicum.yandex.ru/api/user_api/homework_statuses/"
-HEADERS = {"Authorization": f"OAuth {PRACTICUM_TOKEN}"}
+HEADERS = types.MappingProxyType(
+    {"Authorization": f"OAuth {PRACTICUM_TOKEN}"}
+)
+
+SESSION = requests.Session()
+SESSION.headers.update(dict(HEADERS))
+SESSION.mount(
+    "https://",
+    HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0),
+)
 
 
-HOMEWORK_VERDICTS = {
+HOMEWORK_VERDICTS = types.MappingProxyType({
     "approved": "Работа проверена: ревьюеру всё понравилось. Ура!",
     "reviewing": "Работа взята на проверку ревьюером.",
     "rejected": "Работа проверена: у ревьюера есть замечания.",
-}
+})
+
+_FORMAT = 'Изменился статус проверки работы "{0}". {1}'.format
+
+_STOP = threading.Event()
+
+_MISSING = object()
+
+_etag = None
+
+
+def _request_stop(signum, frame):
+    """Запрос остановки бота по сигналу SIGTERM."""
+    logging.info("Получен сигнал остановки, завершаем работу.")
+    _STOP.set()
 
 
 def send_message(bot, message):
@@ -34,36 +81,78 @@ def send_message(bot, message):
     try:
         bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
     except Exception as error:
-        logging.error(f"Ошибка: {error}. Не получилось отправить "
-                      f"сообщение в чат: {TELEGRAM_CHAT_ID}.")
+        logging.error("Ошибка: %s. Не получилось отправить "
+                      "сообщение в чат: %s.", error, TELEGRAM_CHAT_ID)
     else:
-        logging.info(f"Сообщение отправлено чат: {TELEGRAM_CHAT_ID}")
+        logging.info("Сообщение отправлено чат: %s", TELEGRAM_CHAT_ID)
+
+
+def _send_worker(bot, send_queue):
+    """Отправка сообщений из очереди в Telegram в отдельном потоке."""
+    while True:
+        message = send_queue.get()
+        if message is None:
+            break
+        send_message(bot, message)
+
+
+def _queue_message(send_queue, message):
+    """Постановка сообщения в очередь отправки без блокировки опроса."""
+    try:
+        send_queue.put_nowait(message)
+    except queue.Full:
+        logging.warning("Очередь отправки переполнена, "
+                        "сообщение отброшено: %s", message)
 
 
 def get_api_answer(current_timestamp):
-    """Делает запрос к единственному эндпоинту API-сервиса."""
+    """Делает запрос к единственному эндпоинту API-сервиса.
+
+    Возвращает None, если API ответил 304 (данные не менялись).
+    """
+    global _etag
+
     params = {"from_date": current_timestamp}
+    headers = {"If-None-Match": _etag} if _etag else None
 
     try:
-        homework_statuses = requests.get(ENDPOINT,
-                                         headers=HEADERS,
-                                         params=params)
-    except Exception as error:
-        raise Exception(
+        homework_statuses = SESSION.get(ENDPOINT,
+                                        params=params,
+                                        headers=headers,
+                                        timeout=TIMEOUT)
+    except (requests.ConnectionError, requests.Timeout) as error:
+        raise TransientError(
             f"Ошибка в GET-запросе к API сервиса Яндекс.Практикум: {error}. "
-            f"Адрес: {ENDPOINT}. Заголовки: {HEADERS}. "
-            f"Параметры: {params}."
-        )
+            f"Адрес: {ENDPOINT}. Параметры: {params}."
+        ) from error
 
-    if homework_statuses.status_code != HTTPStatus.OK:
-        raise StatusCodeError(
+    status_code = homework_statuses.status_code
+
+    if status_code == HTTPStatus.NOT_MODIFIED:
+        return None
+
+    if status_code != HTTPStatus.OK:
+        message = (
             "Статус кода отличается от 200. "
-            f"Пришедший статус: {homework_statuses.status_code}. "
-            f"Адрес: {ENDPOINT}. Заголовки: {HEADERS}. "
-            f"Параметры: {params}."
+            f"Пришедший статус: {status_code}. "
+            f"Адрес: {ENDPOINT}. Параметры: {params}."
         )
 
-    return homework_statuses.json()
+        if (status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+                or status_code == HTTPStatus.TOO_MANY_REQUESTS):
+            raise TransientError(message)
+
+        raise PermanentError(message)
+
+    _etag = homework_statuses.headers.get("ETag")
+
+    try:
+        return homework_statuses.json()
+    except ValueError as error:
+        raise StatusCodeError(
+            f"Ответ API не является корректным JSON: {error}. "
+            f"Адрес: {ENDPOINT}. Параметры: {params}."
+        ) from error
 
 
 def check_response(response):
@@ -74,10 +163,10 @@ def check_response(response):
             f"Тип пришедшего объекта: {type(response)}"
         )
 
-    if "homeworks" not in response:
-        raise KeyError('Ключа "homeworks" нет в словаре.')
+    homeworks = response.get("homeworks", _MISSING)
 
-    homeworks = response["homeworks"]
+    if homeworks is _MISSING:
+        raise KeyError('Ключа "homeworks" нет в словаре.')
 
     if not isinstance(homeworks, list):
         raise TypeError(
@@ -88,6 +177,12 @@ def check_response(response):
     return homeworks
 
 
+@functools.lru_cache(maxsize=256)
+def _verdict_message(homework_name, verdict):
+    """Сборка сообщения о смене статуса домашней работы."""
+    return _FORMAT(homework_name, verdict)
+
+
 def parse_status(homework):
     """Извлечение из информации о конкретной.
     домашней работе статус этой работы.
@@ -101,85 +196,115 @@ def parse_status(homework):
     homework_name = homework["homework_name"]
     homework_status = homework["status"]
 
-    if homework_status not in HOMEWORK_VERDICTS:
+    verdict = HOMEWORK_VERDICTS.get(homework_status)
+
+    if verdict is None:
         raise KeyError("Недокументированный статус "
                        f"домашней работы: {homework_status}")
 
-    verdict = HOMEWORK_VERDICTS[homework_status]
-
-    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+    return _verdict_message(homework_name, verdict)
 
 
 def check_tokens():
     """Проверка доступности переменных окружения."""
-    tokens = [
-        ('PRACTICUM_TOKEN', PRACTICUM_TOKEN),
-        ('TELEGRAM_TOKEN', TELEGRAM_TOKEN),
-        ('TELEGRAM_CHAT_ID', TELEGRAM_CHAT_ID)
-    ]
+    missing = [name for name in TOKEN_NAMES if globals()[name] is None]
 
-    check_token = True
+    for name in missing:
+        logging.critical("Токен %s недоступен!", name)
 
-    for name, value in tokens:
-        if value is None:
-            logging.critical(f"Токен {name} недоступен!")
-            check_token = False
-    return check_token
+    return not missing
 
 
 def get_current_time():
     """Создание точки отсчета для последующих запросов."""
-    payload = {"url": ENDPOINT, "headers": HEADERS, "params": {"from_date": 0}}
-    response: requests.models.Response = requests.get(**payload)
+    payload = {"url": ENDPOINT, "params": {"from_date": 0}}
+    response: requests.models.Response = SESSION.get(**payload,
+                                                     timeout=TIMEOUT)
     try:
         response_json = response.json()
         last_homework = response_json["homeworks"][0]
         if last_homework["status"] == "approved":
             return response_json["current_date"]
         date_: str = last_homework["date_updated"]
-        return datetime.fromisoformat(date_[:-1])
+        return int(datetime.fromisoformat(date_.rstrip("Z")).timestamp())
     except Exception:
-        return int(datetime.datetime.utcnow().timestamp())
+        return int(time.time())
 
 
-def main():
-    """Основная логика работы бота."""
-    if not check_tokens():
-        raise TokensError("Ошибка в токенах!!")
-
-    bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    current_timestamp = get_current_time()
-
+def _poll_loop(bot, send_queue, current_timestamp):
+    """Цикл опроса API с постановкой обновлений в очередь отправки."""
     message_before = None
     message_error_before = None
     message = None
     message_error = None
+    fail_attempt = 0
 
-    while True:
+    while not _STOP.is_set():
         try:
             response = get_api_answer(current_timestamp)
-            homeworks = check_response(response)
-            current_timestamp = response.get('current_date', int(time.time()))
 
-            if homeworks:
-                message = parse_status(homeworks[0])
-
-            if message != message_before:
-                send_message(bot, message)
-                message_before = message
+            if response is None:
+                logging.debug("Ответ API не изменился (304).")
             else:
-                logging.debug("Статус домашней работы не обновился.")
+                homeworks = check_response(response)
+                current_timestamp = response.get('current_date',
+                                                 int(time.time()))
+
+                if homeworks:
+                    message = "\n\n".join(
+                        parse_status(homework) for homework in homeworks
+                    )
+
+                if message != message_before:
+                    _queue_message(send_queue, message)
+                    message_before = message
+                else:
+                    logging.debug("Статус домашней работы не обновился.")
+
+            fail_attempt = 0
+            sleep_for = RETRY_TIME
+
+        except PermanentError as error:
+            logging.critical(error)
+            send_message(bot, f"Сбой в работе программы. {error}")
+            raise
 
         except Exception as error:
             logging.error(error)
             message_error = f"Сбой в работе программы. {error}"
 
             if message_error != message_error_before:
-                send_message(bot, message_error)
+                _queue_message(send_queue, message_error)
                 message_error_before = message_error
 
-        finally:
-            time.sleep(RETRY_TIME)
+            sleep_for = (min(MAX_DELAY, BASE_DELAY * (2 ** fail_attempt))
+                         * (1 + random.random() * JITTER))
+            fail_attempt += 1
+
+        _STOP.wait(sleep_for)
+
+
+def main():
+    """Основная логика работы бота."""
+    if not check_tokens():
+        raise TokensError("Ошибка в токенах!!")
+
+    signal.signal(signal.SIGTERM, _request_stop)
+
+    bot = telegram.Bot(token=TELEGRAM_TOKEN)
+    current_timestamp = get_current_time()
+
+    send_queue = queue.Queue(maxsize=SEND_QUEUE_SIZE)
+    sender = threading.Thread(
+        target=_send_worker, args=(bot, send_queue), daemon=True
+    )
+    sender.start()
+
+    try:
+        _poll_loop(bot, send_queue, current_timestamp)
+    finally:
+        send_queue.put(None)
+        sender.join(timeout=30)
 
 
 if __name__ == "__main__":
@@ -188,13 +313,27 @@ if __name__ == "__main__":
         'hwbot_log.log'
     )
 
+    log_format = ("%(asctime)s - [%(levelname)s] "
+                  "- %(funcName)s(%(lineno)d) - %(message)s")
+
+    file_handler = RotatingFileHandler(
+        log_path,
+        maxBytes=10 * 1024 * 1024,
+        backupCount=3,
+        delay=True,
+    )
+    file_handler.setFormatter(logging.Formatter(log_format))
+
     logging.basicConfig(
         level=logging.DEBUG,
-        format=("%(asctime)s - [%(levelname)s] "
-                "- %(funcName)s(%(lineno)d) - %(message)s"),
+        format=log_format,
         handlers=[
             logging.StreamHandler(sys.stdout),
-            logging.FileHandler(filename=log_path),
+            MemoryHandler(
+                capacity=200,
+                flushLevel=logging.ERROR,
+                target=file_handler,
+            ),
         ],
     )
 
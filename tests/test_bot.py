@@ -6,6 +6,19 @@ import telegram
 import utils
 
 
+def as_session_get(response_get):
+    """Подставляет мок GET-запроса в requests.Session.get.
+
+    Сессия хранит заголовки на себе, поэтому перед вызовом мока они
+    объединяются с заголовками конкретного запроса, как это делает requests.
+    """
+    def session_get(session, url, **kwargs):
+        headers = dict(session.headers)
+        headers.update(kwargs.pop('headers', None) or {})
+        return response_get(url, headers=headers, **kwargs)
+    return session_get
+
+
 class MockResponseGET:
 
     def __init__(self, url, params=None, random_timestamp=None,
@@ -44,6 +57,7 @@ class MockResponseGET:
         )
         self.random_timestamp = random_timestamp
         self.status_code = http_status
+        self.headers = {}
 
     def json(self):
         data = {
@@ -186,7 +200,9 @@ class TestHomework:
                 current_timestamp=current_timestamp, **kwargs
             )
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(
+            requests.Session, 'get', as_session_get(mock_response_get)
+        )
 
         import homework
 
@@ -232,7 +248,9 @@ class TestHomework:
             response.json = json_invalid
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_500_response_get)
+        monkeypatch.setattr(
+            requests.Session, 'get', as_session_get(mock_500_response_get)
+        )
 
         import homework
 
@@ -315,7 +333,9 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(
+            requests.Session, 'get', as_session_get(mock_response_get)
+        )
 
         import homework
 
@@ -352,7 +372,9 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(
+            requests.Session, 'get', as_session_get(mock_response_get)
+        )
 
         import homework
 
@@ -400,7 +422,9 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(
+            requests.Session, 'get', as_session_get(mock_response_get)
+        )
 
         import homework
 
@@ -448,7 +472,9 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(
+            requests.Session, 'get', as_session_get(mock_response_get)
+        )
 
         import homework
 
@@ -484,7 +510,10 @@ class TestHomework:
             response.json = json_invalid
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_no_homeworks_response_get)
+        monkeypatch.setattr(
+            requests.Session, 'get',
+            as_session_get(mock_no_homeworks_response_get)
+        )
 
         import homework
 
@@ -525,7 +554,9 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(
+            requests.Session, 'get', as_session_get(mock_response_get)
+        )
 
         import homework
 
@@ -565,7 +596,9 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(
+            requests.Session, 'get', as_session_get(mock_response_get)
+        )
 
         import homework
 
@@ -599,7 +632,9 @@ class TestHomework:
             response.json = json_invalid
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_empty_response_get)
+        monkeypatch.setattr(
+            requests.Session, 'get', as_session_get(mock_empty_response_get)
+        )
 
         import homework
 
@@ -626,7 +661,9 @@ class TestHomework:
             )
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(
+            requests.Session, 'get', as_session_get(mock_response_get)
+        )
 
         import homework
 